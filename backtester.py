@@ -1,46 +1,70 @@
 import pandas as pd
 import numpy as np
 
+from bt_kernels import (
+    as_f32,
+    as_i8,
+    ensure_sorted,
+    max_drawdown,
+    mean_std,
+    pipeline,
+)
+
+# joblib is optional: without it backtest_batch runs serially
+try:
+    from joblib import Parallel, delayed
+    HAVE_JOBLIB = True
+except ImportError:
+    HAVE_JOBLIB = False
+
 class Backtester:
     """
     Generic backtester for long/short/flat strategies.
 
     Requirements of the input DataFrame:
     - Must contain 'Datetime', 'Close', and 'position' columns
-    - position ∈ { -1, 0, +1 } and is already shifted (no lookahead)
+    - position ∈ { -1, 0, +1 } and is already shifted (no lookahead);
+      finalize_positions stores it as int8, which is used as-is
     """
 
     def __init__(self, df, initial_capital=100_000):
-        self.df = df.copy().sort_values("Datetime")
+        # run() never modifies self.df, so no defensive copy is needed
+        self.df = ensure_sorted(df)
         self.initial_capital = initial_capital
 
     def run(self):
-        df = self.df
-
-        # 1. Compute returns
-        df["returns"] = df["Close"].pct_change()
-
-        # 2. Strategy returns (returns * position)
-        df["strategy_returns"] = df["returns"] * df["position"]
-
-        # 3. Cumulative equity curve
-        df["equity"] = (1 + df["strategy_returns"]).cumprod() * self.initial_capital
-
-        # 4. Buy & hold benchmark
-        df["buy_hold"] = (1 + df["returns"]).cumprod() * self.initial_capital
+        # float32 prices and int8 positions keep memory traffic low;
+        # Sharpe/trade sums accumulate in float64
+        close = as_f32(self.df["Close"])
+        pos = as_i8(self.df["position"])
+
+        # 1-4. Returns, strategy returns, equity curve and buy & hold
+        #      benchmark in one fused pass (first bar has no return),
+        #      with per-trade counters streamed out of the same loop
+        returns, strategy_returns, equity, buy_hold, trades = pipeline(
+            close, pos, float(self.initial_capital)
+        )
 
         # 5. Compute Sharpe Ratio
-        sharpe = self._compute_sharpe(df["strategy_returns"])
+        sharpe = self._compute_sharpe(strategy_returns)
 
         # 6. Compute Max Drawdown
-        max_dd = self._compute_max_drawdown(df["equity"])
+        max_dd = self._compute_max_drawdown(equity)
 
         # 7. Compute trade metrics
-        trade_stats = self._compute_trade_stats(df)
+        trade_stats = self._compute_trade_stats(trades)
+
+        # Attach all result columns in a single step
+        df = self.df.assign(
+            returns=returns,
+            strategy_returns=strategy_returns,
+            equity=equity,
+            buy_hold=buy_hold,
+        )
 
         results = {
-            "final_equity": df["equity"].iloc[-1],
-            "buy_hold_final": df["buy_hold"].iloc[-1],
+            "final_equity": equity[-1],
+            "buy_hold_final": buy_hold[-1],
             "sharpe_ratio": sharpe,
             "max_drawdown": max_dd,
             "trade_stats": trade_stats,
@@ -58,47 +82,24 @@ class Backtester:
         Hourly data → approx 6.5 hours per day × 252 days.
         Sharpe = mean / std * sqrt(periods)
         """
-        if returns.std() == 0:
+        mean, std = mean_std(returns)
+        if std == 0:
             return 0
-        return (returns.mean() / returns.std()) * np.sqrt(periods_per_year)
+        return (mean / std) * np.sqrt(periods_per_year)
 
     def _compute_max_drawdown(self, equity_curve):
-        rolling_max = equity_curve.cummax()
-        dd = (equity_curve - rolling_max) / rolling_max
-        return dd.min()
+        if isinstance(equity_curve, pd.Series):
+            equity_curve = equity_curve.to_numpy()
+        return max_drawdown(equity_curve)
 
-    def _compute_trade_stats(self, df):
+    def _compute_trade_stats(self, trades):
         """
         Counts trades, wins, losses, win rate.
         A trade begins when position changes.
+        trades: (num_trades, wins, losses, sum_pnl, n_pnl) from the pipeline
         """
-        df["pos_change"] = df["position"].diff().fillna(0)
-        trade_entries = df[df["pos_change"] != 0]
-
-        num_trades = len(trade_entries)
-
-        # Measure PnL between position changes
-        df["pnl"] = df["strategy_returns"] * self.initial_capital
-        trade_pnls = []
-
-        current_pnl = 0
-        prev_pos = df["position"].iloc[0]
-
-        for _, row in df.iterrows():
-            if row["position"] == prev_pos:
-                current_pnl += row["pnl"]
-            else:
-                trade_pnls.append(current_pnl)
-                current_pnl = 0
-            prev_pos = row["position"]
-
-        if current_pnl != 0:
-            trade_pnls.append(current_pnl)
-
-        trade_pnls = np.array(trade_pnls)
-
-        wins = (trade_pnls > 0).sum()
-        losses = (trade_pnls < 0).sum()
+        # Per-trade PnL is summed in return units, then scaled by capital
+        num_trades, wins, losses, sum_pnl, n_pnl = trades
 
         win_rate = wins / max(1, (wins + losses))
 
@@ -107,6 +108,41 @@ class Backtester:
             "wins": wins,
             "losses": losses,
             "win_rate": win_rate,
-            "avg_pnl": trade_pnls.mean() if len(trade_pnls) > 0 else 0
+            "avg_pnl": sum_pnl * self.initial_capital / n_pnl if n_pnl > 0 else 0
         }
 
+
+# ==========================================================
+# Batch Backtesting
+# ==========================================================
+
+def _backtest_one(df, strategy, initial_capital):
+    signals = strategy.generate_signals(df)
+    return Backtester(signals, initial_capital).run()
+
+
+def backtest_batch(dfs, strategies, initial_capital=100_000, n_jobs=-1):
+    """
+    Backtests every (ticker, strategy) pair, in parallel across processes
+    when joblib is available.
+
+    dfs: dict of ticker -> DataFrame with the columns the strategies need
+    strategies: list of strategy instances (e.g. a parameter grid)
+    Returns a dict of (ticker, strategy) -> results from Backtester.run
+    """
+    # Sort each ticker once here rather than once per strategy
+    dfs = {ticker: ensure_sorted(df) for ticker, df in dfs.items()}
+    tasks = [(ticker, strategy) for ticker in dfs for strategy in strategies]
+
+    if HAVE_JOBLIB:
+        runs = Parallel(n_jobs=n_jobs, backend="loky")(
+            delayed(_backtest_one)(dfs[ticker], strategy, initial_capital)
+            for ticker, strategy in tasks
+        )
+    else:
+        runs = [
+            _backtest_one(dfs[ticker], strategy, initial_capital)
+            for ticker, strategy in tasks
+        ]
+
+    return dict(zip(tasks, runs))
@@ -0,0 +1,724 @@
+import numpy as np
+import pandas as pd
+
+# numba is optional: every kernel below has a NumPy/pandas fallback
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    prange = range
+    HAVE_NUMBA = False
+
+
+def ensure_sorted(df):
+    """
+    Returns df unchanged if 'Datetime' is already ascending (the common
+    case, e.g. data from data_loader), otherwise a sorted copy.
+    """
+    if df["Datetime"].is_monotonic_increasing:
+        return df
+    return df.sort_values("Datetime")
+
+
+def as_f32(s):
+    """
+    Column → contiguous float32 ndarray, the layout every kernel expects.
+    No copy is made when the column is already contiguous float32.
+    """
+    return np.ascontiguousarray(s.to_numpy(dtype=np.float32))
+
+
+def as_i8(s):
+    """
+    Position column → contiguous int8 ndarray. int8 columns are passed
+    through as is; any other dtype has NaN/<NA> treated as flat (0) and
+    must otherwise hold only -1, 0 or +1, so e.g. 0.5 raises ValueError
+    instead of being truncated by the cast.
+    """
+    if s.dtype == np.int8:
+        return np.ascontiguousarray(s.to_numpy())
+
+    x = np.nan_to_num(s.to_numpy(dtype=np.float64, na_value=np.nan), nan=0.0)
+    if not np.isin(x, (-1, 0, 1)).all():
+        raise ValueError(f"Column '{s.name}' must only contain -1, 0, +1 or NaN.")
+    return x.astype(np.int8)
+
+
+# ================================================================
+# Rolling Window Statistics
+# ================================================================
+# The per-step window updates and signal rules below are shared by the
+# rolling, threshold and fused kernels, so each one exists exactly once.
+
+def _window_add(v, cnt, nans, mu, m2):
+    """
+    Welford update adding v to a window with running moments (mu, m2)
+    over cnt non-NaN values and nans NaN values. The moments are kept in
+    float64 whatever v's dtype, also when run as plain Python.
+    """
+    if v == v:
+        f = float(v)
+        cnt += 1
+        d = f - mu
+        mu += d / cnt
+        m2 += d * (f - mu)
+    else:
+        nans += 1
+    return cnt, nans, mu, m2
+
+
+def _window_remove(u, cnt, nans, mu, m2):
+    """
+    Welford update removing u from the window; inverse of _window_add.
+    """
+    if u == u:
+        cnt -= 1
+        if cnt == 0:
+            mu = 0.0
+            m2 = 0.0
+        else:
+            f = float(u)
+            d = f - mu
+            mu -= d / cnt
+            m2 -= d * (f - mu)
+    else:
+        nans -= 1
+    return cnt, nans, mu, m2
+
+
+def _window_std(m2, w):
+    """
+    Sample std (ddof=1) of a full window of w > 1 values.
+    """
+    return np.sqrt(max(m2 / (w - 1), 0.0))
+
+
+def _deviation_rule(c, ma, thr):
+    # Short takes precedence if the thresholds overlap
+    dev = (c - ma) / ma
+    if dev > thr:
+        return -1
+    if dev < -thr:
+        return 1
+    return 0
+
+
+def _zscore_rule(c, ma, std, thr):
+    # Long takes precedence if the thresholds overlap
+    z = (c - ma) / std
+    if z < -thr:
+        return 1
+    if z > thr:
+        return -1
+    return 0
+
+
+def _channel_rule(c, hi, lo):
+    # Short takes precedence if both channel edges are broken
+    if c < lo:
+        return -1
+    if c > hi:
+        return 1
+    return 0
+
+
+def _deque_push_max(x, q, head, tail, nans, i):
+    """
+    Pushes bar i onto a monotonic max-deque of indices q[head:tail],
+    dropping indices whose values can no longer be the max.
+    NaN bars are only counted.
+    """
+    v = x[i]
+    if v == v:
+        while tail > head and x[q[tail - 1]] <= v:
+            tail -= 1
+        q[tail] = i
+        tail += 1
+    else:
+        nans += 1
+    return tail, nans
+
+
+def _deque_push_min(x, q, head, tail, nans, i):
+    """
+    Min-deque counterpart of _deque_push_max.
+    """
+    v = x[i]
+    if v == v:
+        while tail > head and x[q[tail - 1]] >= v:
+            tail -= 1
+        q[tail] = i
+        tail += 1
+    else:
+        nans += 1
+    return tail, nans
+
+
+def _deque_expire(x, q, head, tail, nans, i, w):
+    """
+    Drops bar i - w from a window of w bars ending at bar i.
+    """
+    if i >= w:
+        if x[i - w] != x[i - w]:
+            nans -= 1
+        if tail > head and q[head] <= i - w:
+            head += 1
+    return head, nans
+
+
+if HAVE_NUMBA:
+    _window_add = njit(nogil=True, cache=True)(_window_add)
+    _window_remove = njit(nogil=True, cache=True)(_window_remove)
+    _window_std = njit(nogil=True, cache=True)(_window_std)
+    _deviation_rule = njit(nogil=True, cache=True, error_model="numpy")(_deviation_rule)
+    _zscore_rule = njit(nogil=True, cache=True, error_model="numpy")(_zscore_rule)
+    _channel_rule = njit(nogil=True, cache=True)(_channel_rule)
+    _deque_push_max = njit(nogil=True, cache=True)(_deque_push_max)
+    _deque_push_min = njit(nogil=True, cache=True)(_deque_push_min)
+    _deque_expire = njit(nogil=True, cache=True)(_deque_expire)
+
+
+def _rolling_mean_std_loop(x, w):
+    """
+    Rolling mean and sample std (ddof=1) over a window of w bars, using
+    Welford add/remove updates so each step is O(1). Outputs have x's dtype;
+    the running moments are accumulated in float64.
+    Output is NaN until the window is full or while it contains a NaN.
+    """
+    n = x.size
+    mean = np.full(n, np.nan, dtype=x.dtype)
+    std = np.full(n, np.nan, dtype=x.dtype)
+
+    cnt = 0      # non-NaN values in the window
+    nans = 0     # NaN values in the window
+    mu = 0.0
+    m2 = 0.0
+
+    for i in range(n):
+        cnt, nans, mu, m2 = _window_add(x[i], cnt, nans, mu, m2)
+        if i >= w:
+            cnt, nans, mu, m2 = _window_remove(x[i - w], cnt, nans, mu, m2)
+
+        if i >= w - 1 and nans == 0:
+            mean[i] = mu
+            if w > 1:
+                std[i] = _window_std(m2, w)
+
+    return mean, std
+
+
+def _rolling_mean_std_pandas(x, w):
+    """
+    Fallback for rolling_mean_std using pandas' rolling window.
+    """
+    roll = pd.Series(x).rolling(w)
+    return roll.mean().to_numpy(dtype=x.dtype), roll.std().to_numpy(dtype=x.dtype)
+
+
+def _rolling_max_loop(x, w):
+    """
+    Rolling max over a window of w bars using a monotonic deque of indices
+    (preallocated int32 buffer), so each element is pushed and
+    popped at most once. Output is NaN until the window is full or while
+    it contains a NaN.
+    """
+    n = x.size
+    out = np.full(n, np.nan, dtype=x.dtype)
+    q = np.empty(n, dtype=np.int32)
+    head = 0
+    tail = 0
+    nans = 0
+
+    for i in range(n):
+        tail, nans = _deque_push_max(x, q, head, tail, nans, i)
+        head, nans = _deque_expire(x, q, head, tail, nans, i, w)
+        if i >= w - 1 and nans == 0:
+            out[i] = x[q[head]]
+
+    return out
+
+
+def _rolling_min_loop(x, w):
+    """
+    Rolling min counterpart of _rolling_max_loop.
+    """
+    n = x.size
+    out = np.full(n, np.nan, dtype=x.dtype)
+    q = np.empty(n, dtype=np.int32)
+    head = 0
+    tail = 0
+    nans = 0
+
+    for i in range(n):
+        tail, nans = _deque_push_min(x, q, head, tail, nans, i)
+        head, nans = _deque_expire(x, q, head, tail, nans, i, w)
+        if i >= w - 1 and nans == 0:
+            out[i] = x[q[head]]
+
+    return out
+
+
+def _rolling_max_pandas(x, w):
+    """
+    Fallback for rolling_max using pandas' rolling window.
+    """
+    return pd.Series(x).rolling(w).max().to_numpy(dtype=x.dtype)
+
+
+def _rolling_min_pandas(x, w):
+    """
+    Fallback for rolling_min using pandas' rolling window.
+    """
+    return pd.Series(x).rolling(w).min().to_numpy(dtype=x.dtype)
+
+
+if HAVE_NUMBA:
+    rolling_mean_std = njit(nogil=True, cache=True)(_rolling_mean_std_loop)
+    rolling_max = njit(nogil=True, cache=True)(_rolling_max_loop)
+    rolling_min = njit(nogil=True, cache=True)(_rolling_min_loop)
+else:
+    rolling_mean_std = _rolling_mean_std_pandas
+    rolling_max = _rolling_max_pandas
+    rolling_min = _rolling_min_pandas
+
+
+# ================================================================
+# Threshold Signal Kernels
+# ================================================================
+# These turn precomputed rolling statistics into int8 signals, so the
+# statistics themselves can be cached and reused across parameter sweeps.
+
+def _deviation_signals_loop(close, ma, thr):
+    """
+    +1 when close is more than thr below ma (as a fraction of ma),
+    -1 when more than thr above it, 0 otherwise (including NaN).
+    """
+    n = close.size
+    sig = np.zeros(n, dtype=np.int8)
+    for i in range(n):
+        sig[i] = _deviation_rule(close[i], ma[i], thr)
+    return sig
+
+
+def _zscore_signals_loop(close, ma, std, thr):
+    """
+    +1 when the z-score of close is below -thr, -1 when above thr,
+    0 otherwise (including NaN).
+    """
+    n = close.size
+    sig = np.zeros(n, dtype=np.int8)
+    for i in range(n):
+        sig[i] = _zscore_rule(close[i], ma[i], std[i], thr)
+    return sig
+
+
+def _channel_signals_loop(close, high_roll, low_roll):
+    """
+    +1 when close breaks above the previous bar's rolling high,
+    -1 when it breaks below the previous bar's rolling low.
+    """
+    n = close.size
+    sig = np.zeros(n, dtype=np.int8)
+    for i in range(1, n):
+        sig[i] = _channel_rule(close[i], high_roll[i - 1], low_roll[i - 1])
+    return sig
+
+
+def _deviation_signals_numpy(close, ma, thr):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dev = (close - ma) / ma
+
+    # Short takes precedence if the thresholds overlap
+    return np.where(dev > thr, np.int8(-1), np.where(dev < -thr, np.int8(1), np.int8(0)))
+
+
+def _zscore_signals_numpy(close, ma, std, thr):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (close - ma) / std
+
+    # Long takes precedence if the thresholds overlap
+    return np.where(z < -thr, np.int8(1), np.where(z > thr, np.int8(-1), np.int8(0)))
+
+
+def _channel_signals_numpy(close, high_roll, low_roll):
+    # Short takes precedence if both channel edges are broken
+    sig = np.zeros(close.size, dtype=np.int8)
+    sig[1:] = np.where(
+        close[1:] < low_roll[:-1],
+        np.int8(-1),
+        np.where(close[1:] > high_roll[:-1], np.int8(1), np.int8(0)),
+    )
+    return sig
+
+
+if HAVE_NUMBA:
+    deviation_signals = njit(nogil=True, cache=True, error_model="numpy")(_deviation_signals_loop)
+    zscore_signals = njit(nogil=True, cache=True, error_model="numpy")(_zscore_signals_loop)
+    channel_signals = njit(nogil=True, cache=True)(_channel_signals_loop)
+else:
+    deviation_signals = _deviation_signals_numpy
+    zscore_signals = _zscore_signals_numpy
+    channel_signals = _channel_signals_numpy
+
+
+# ================================================================
+# Fused Signal Kernels
+# ================================================================
+
+def _blsh_signals_loop(close, w, thr):
+    """
+    Buy-Low-Sell-High signal in one pass: running moving average,
+    percent deviation and thresholding fused into a single loop.
+    Returns int8 signals in {-1, 0, +1}, identical to
+    deviation_signals(close, rolling_mean_std(close, w)[0], thr).
+    """
+    n = close.size
+    sig = np.zeros(n, dtype=np.int8)
+
+    # The mean is rounded to close's dtype, as rolling_mean_std stores it
+    ma = np.empty(1, dtype=close.dtype)
+
+    cnt = 0
+    nans = 0
+    mu = 0.0
+    m2 = 0.0
+
+    for i in range(n):
+        cnt, nans, mu, m2 = _window_add(close[i], cnt, nans, mu, m2)
+        if i >= w:
+            cnt, nans, mu, m2 = _window_remove(close[i - w], cnt, nans, mu, m2)
+
+        if i >= w - 1 and nans == 0:
+            ma[0] = mu
+            sig[i] = _deviation_rule(close[i], ma[0], thr)
+
+    return sig
+
+
+def _meanrev_signals_loop(close, w, thr):
+    """
+    Z-score mean reversion signal in one pass: running mean and sample std
+    (Welford add/remove), z-score and thresholding fused into a single loop.
+    Returns int8 signals in {-1, 0, +1}, identical to zscore_signals over
+    rolling_mean_std(close, w).
+    """
+    n = close.size
+    sig = np.zeros(n, dtype=np.int8)
+
+    # Moments rounded to close's dtype, as rolling_mean_std stores them
+    ms = np.empty(2, dtype=close.dtype)
+
+    cnt = 0
+    nans = 0
+    mu = 0.0
+    m2 = 0.0
+
+    for i in range(n):
+        cnt, nans, mu, m2 = _window_add(close[i], cnt, nans, mu, m2)
+        if i >= w:
+            cnt, nans, mu, m2 = _window_remove(close[i - w], cnt, nans, mu, m2)
+
+        if w > 1 and i >= w - 1 and nans == 0:
+            ms[0] = mu
+            ms[1] = _window_std(m2, w)
+            sig[i] = _zscore_rule(close[i], ms[0], ms[1], thr)
+
+    return sig
+
+
+def _breakout_signals_loop(close, high, low, w):
+    """
+    Breakout signal in one pass: the close is compared against the
+    high/low channel of the previous w bars, with the channel maintained
+    by two monotonic deques. Returns int8 signals in {-1, 0, +1}.
+    """
+    n = close.size
+    sig = np.zeros(n, dtype=np.int8)
+
+    qh = np.empty(n, dtype=np.int32)
+    ql = np.empty(n, dtype=np.int32)
+    hh = 0
+    th = 0
+    hl = 0
+    tl = 0
+    nh = 0
+    nl = 0
+
+    for i in range(n):
+        # Channel state currently covers bars [i - w, i - 1]
+        if i >= w:
+            hi = high[qh[hh]] if nh == 0 else np.nan
+            lo = low[ql[hl]] if nl == 0 else np.nan
+            sig[i] = _channel_rule(close[i], hi, lo)
+
+        # Slide both channels to end at bar i
+        th, nh = _deque_push_max(high, qh, hh, th, nh, i)
+        hh, nh = _deque_expire(high, qh, hh, th, nh, i, w)
+        tl, nl = _deque_push_min(low, ql, hl, tl, nl, i)
+        hl, nl = _deque_expire(low, ql, hl, tl, nl, i, w)
+
+    return sig
+
+
+def _blsh_signals_numpy(close, w, thr):
+    """
+    Fallback for blsh_signals built from rolling_mean_std.
+    """
+    return deviation_signals(close, rolling_mean_std(close, w)[0], thr)
+
+
+def _meanrev_signals_numpy(close, w, thr):
+    """
+    Fallback for meanrev_signals built from rolling_mean_std.
+    """
+    ma, std = rolling_mean_std(close, w)
+    return zscore_signals(close, ma, std, thr)
+
+
+def _breakout_signals_numpy(close, high, low, w):
+    """
+    Fallback for breakout_signals built from rolling_max / rolling_min.
+    """
+    return channel_signals(close, rolling_max(high, w), rolling_min(low, w))
+
+
+if HAVE_NUMBA:
+    blsh_signals = njit(nogil=True, cache=True, error_model="numpy")(_blsh_signals_loop)
+    meanrev_signals = njit(nogil=True, cache=True, error_model="numpy")(_meanrev_signals_loop)
+    breakout_signals = njit(nogil=True, cache=True)(_breakout_signals_loop)
+else:
+    blsh_signals = _blsh_signals_numpy
+    meanrev_signals = _meanrev_signals_numpy
+    breakout_signals = _breakout_signals_numpy
+
+
+def _blsh_signals_batch_loop(close, w, thr):
+    """
+    blsh_signals over a stack of series laid out as close[ticker, t],
+    one ticker per parallel iteration.
+    """
+    sig = np.empty(close.shape, dtype=np.int8)
+    for j in prange(close.shape[0]):
+        sig[j] = blsh_signals(close[j], w, thr)
+    return sig
+
+
+if HAVE_NUMBA:
+    blsh_signals_batch = njit(parallel=True, cache=True)(_blsh_signals_batch_loop)
+else:
+    blsh_signals_batch = _blsh_signals_batch_loop
+
+
+# ================================================================
+# Backtest Pipeline
+# ================================================================
+
+def _pipeline_loop(close, pos, cap):
+    """
+    Returns, strategy returns, equity and buy & hold in a single pass,
+    with trade segmentation streamed in the same loop.
+    The first bar has no return (NaN); NaN returns leave the curves flat.
+    Curves are compounded in float64 and stored in close's dtype; pos is
+    typically int8 and only promoted to float inside the loop.
+    Returns (returns, strategy_returns, equity, buy_hold, trades) where
+    trades is (num_trades, wins, losses, sum_pnl, n_pnl).
+    """
+    n = close.size
+    returns = np.empty(n, dtype=close.dtype)
+    strat = np.empty(n, dtype=close.dtype)
+    equity = np.empty(n, dtype=close.dtype)
+    buy_hold = np.empty(n, dtype=close.dtype)
+
+    num_trades = 0
+    wins = 0
+    losses = 0
+    sum_pnl = 0.0
+    n_pnl = 0
+
+    if n == 0:
+        return returns, strat, equity, buy_hold, (num_trades, wins, losses, sum_pnl, n_pnl)
+
+    e = cap
+    b = cap
+    returns[0] = np.nan
+    strat[0] = np.nan
+    equity[0] = e
+    buy_hold[0] = b
+
+    prev = pos[0]
+    cur = 0.0
+
+    for i in range(1, n):
+        r = close[i] / close[i - 1] - 1.0
+        s = r * pos[i]
+
+        # Flush the trade segment when the position changes
+        if pos[i] != prev:
+            wins += cur > 0.0
+            losses += cur < 0.0
+            sum_pnl += cur
+            n_pnl += 1
+            num_trades += 1
+            cur = 0.0
+            prev = pos[i]
+
+        if s == s:
+            e *= 1.0 + s
+            cur += s
+        if r == r:
+            b *= 1.0 + r
+        returns[i] = r
+        strat[i] = s
+        equity[i] = e
+        buy_hold[i] = b
+
+    # Flush the last segment
+    wins += cur > 0.0
+    losses += cur < 0.0
+    sum_pnl += cur
+    n_pnl += 1
+
+    return returns, strat, equity, buy_hold, (num_trades, wins, losses, sum_pnl, n_pnl)
+
+
+def _segment_pnl_numpy(pos, pnl):
+    """
+    Sums PnL over each run of constant position using np.add.reduceat,
+    the trade segmentation _pipeline_numpy does after its vectorized steps.
+    NaN PnL values are skipped.
+
+    Returns (num_trades, wins, losses, sum_pnl, n_pnl) where num_trades is
+    the number of position changes and n_pnl the number of segments.
+    """
+    n = pos.size
+    if n == 0:
+        return 0, 0, 0, 0.0, 0
+
+    # Mark bars where the position differs from the previous bar
+    changes = np.empty(n, dtype=bool)
+    changes[0] = True
+    changes[1:] = pos[1:] != pos[:-1]
+
+    starts = np.flatnonzero(changes)
+    # Sum in float64 even when pnl is float32, as the numba loop does
+    trade_pnls = np.add.reduceat(np.nan_to_num(pnl), starts, dtype=np.float64)
+
+    return (
+        int(starts.size - 1),
+        int((trade_pnls > 0).sum()),
+        int((trade_pnls < 0).sum()),
+        float(trade_pnls.sum()),
+        int(trade_pnls.size),
+    )
+
+
+def _pipeline_numpy(close, pos, cap):
+    """
+    Fallback for pipeline using vectorized NumPy steps and _segment_pnl_numpy.
+    """
+    # Divide straight into the output buffer, then subtract in place
+    returns = np.empty_like(close)
+    returns[:1] = np.nan
+    np.divide(close[1:], close[:-1], out=returns[1:])
+    returns[1:] -= 1
+
+    strat = returns * pos
+
+    # Compound in float64, store in close's dtype
+    equity = np.cumprod(1 + np.nan_to_num(strat), dtype=np.float64) * cap
+    buy_hold = np.cumprod(1 + np.nan_to_num(returns), dtype=np.float64) * cap
+
+    trades = _segment_pnl_numpy(pos, strat)
+
+    return returns, strat, equity.astype(close.dtype), buy_hold.astype(close.dtype), trades
+
+
+if HAVE_NUMBA:
+    pipeline = njit(nogil=True, cache=True, error_model="numpy")(_pipeline_loop)
+else:
+    pipeline = _pipeline_numpy
+
+
+# ================================================================
+# Performance Metrics
+# ================================================================
+
+def _max_drawdown_loop(eq):
+    """
+    Maximum drawdown of an equity curve in one pass, tracking the running
+    peak. Returns a value <= 0 (e.g. -0.1 for a 10% drawdown).
+    """
+    mdd = 0.0
+    if eq.size == 0:
+        return mdd
+
+    peak = eq[0]
+    for i in range(1, eq.size):
+        if eq[i] > peak:
+            peak = eq[i]
+        dd = (eq[i] - peak) / peak
+        if dd < mdd:
+            mdd = dd
+
+    return mdd
+
+
+def _max_drawdown_numpy(eq):
+    """
+    Fallback for max_drawdown using np.maximum.accumulate. The drawdown
+    eq / peak - 1 is computed in place in the running-max buffer, so only
+    one N-sized array is allocated and eq is left untouched.
+    """
+    if eq.size == 0:
+        return 0.0
+    dd = np.maximum.accumulate(eq)
+    np.divide(eq, dd, out=dd)
+    dd -= 1
+    return min(float(dd.min()), 0.0)
+
+
+def _mean_std_loop(x):
+    """
+    Mean and sample std (ddof=1) in one Welford pass, skipping NaNs.
+    Returns NaN for the std when fewer than two values are present.
+    """
+    n = 0
+    mu = 0.0
+    m2 = 0.0
+    for i in range(x.size):
+        v = x[i]
+        if v == v:
+            # float64 moments even for float32 x, also as plain Python
+            f = float(v)
+            n += 1
+            d = f - mu
+            mu += d / n
+            m2 += d * (f - mu)
+
+    if n == 0:
+        return np.nan, np.nan
+    if n == 1:
+        return mu, np.nan
+    return mu, np.sqrt(m2 / (n - 1))
+
+
+def _mean_std_numpy(x):
+    """
+    Fallback for mean_std using NaN-aware NumPy reductions, accumulated
+    in float64 like the loop.
+    """
+    x = x.astype(np.float64, copy=False)
+    n = np.count_nonzero(~np.isnan(x))
+    if n == 0:
+        return np.nan, np.nan
+    if n == 1:
+        return float(np.nanmean(x)), np.nan
+    return float(np.nanmean(x)), float(np.nanstd(x, ddof=1))
+
+
+if HAVE_NUMBA:
+    max_drawdown = njit(nogil=True, cache=True)(_max_drawdown_loop)
+    mean_std = njit(nogil=True, cache=True)(_mean_std_loop)
+else:
+    max_drawdown = _max_drawdown_numpy
+    mean_std = _mean_std_numpy
@@ -1,14 +1,104 @@
-import yfinance as yf
+import os
+
+import numpy as np
+import pandas as pd
 
 equities_tickers = ['AAPL', 'MSFT', 'TSLA', 'AMZN', 'PLTR']
 
-equities_data = yf.download(
-    equities_tickers, 
-    start='2024-01-01', 
-    end='2025-01-01',
-    interval='1h',
-    group_by='ticker'
-)
+CSV_PATH = 'equities_intraday_1h_1year.csv'
+CACHE_DIR = 'cache'
+
+price_cols = ['Open', 'High', 'Low', 'Close']
+
+
+def download_equities(tickers=equities_tickers):
+    """
+    Downloads one year of hourly bars from Yahoo Finance.
+    Returns a DataFrame with (ticker, field) MultiIndex columns.
+    """
+    import yfinance as yf
+
+    return yf.download(
+        tickers,
+        start='2024-01-01',
+        end='2025-01-01',
+        interval='1h',
+        group_by='ticker'
+    )
+
+
+def read_equities_csv(csv_path=CSV_PATH):
+    """
+    Reads the combined CSV written by `python data_loader.py` back into
+    the (ticker, field) column layout that download_equities returns.
+    """
+    return pd.read_csv(csv_path, header=[0, 1], index_col=0, parse_dates=True)
+
+
+def _cache_path(ticker, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, f"{ticker}_1h.parquet")
+
+
+def write_cache(equities_data, cache_dir=CACHE_DIR):
+    """
+    Splits a group_by='ticker' download into one Parquet file per ticker,
+    each with 'Datetime', 'Open', 'High', 'Low', 'Close', 'Volume' columns.
+    Prices are stored as float32, which is what the strategy kernels consume.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+
+    for ticker in equities_data.columns.get_level_values(0).unique():
+        df = equities_data[ticker].sort_index().reset_index()
+        df.columns.name = None
+        df[price_cols] = df[price_cols].astype("float32")
+        df.to_parquet(_cache_path(ticker, cache_dir), index=False)
+
+
+def load_ticker(ticker, cache_dir=CACHE_DIR, csv_path=CSV_PATH):
+    """
+    Loads hourly bars for one ticker from the Parquet cache. On a miss the
+    cache is filled from the combined CSV when it exists (it ships with the
+    repo), and from a fresh download otherwise.
+    Rows are already in ascending 'Datetime' order, so the strategies'
+    and Backtester's sort check is a no-op on this data.
+    """
+    path = _cache_path(ticker, cache_dir)
+
+    if not os.path.exists(path):
+        if os.path.exists(csv_path):
+            write_cache(read_equities_csv(csv_path), cache_dir)
+        else:
+            write_cache(download_equities(), cache_dir)
+
+    return pd.read_parquet(path)
+
+
+def load_arrays(tickers=equities_tickers, cache_dir=CACHE_DIR, csv_path=CSV_PATH):
+    """
+    Loads each ticker as separate 1-D contiguous arrays rather than one wide
+    group_by='ticker' frame, so kernels read each series with linear loads.
+    Returns {ticker: {"datetime", "open", "high", "low", "close", "volume"}}
+    with prices as float32 and datetimes as naive UTC datetime64.
+    """
+    arrays = {}
+    for ticker in tickers:
+        df = load_ticker(ticker, cache_dir, csv_path)
+
+        # Naive UTC datetime64 instead of an object array of Timestamps
+        dt = df["Datetime"]
+        if dt.dt.tz is not None:
+            dt = dt.dt.tz_convert("UTC").dt.tz_localize(None)
+
+        arrays[ticker] = {"datetime": dt.to_numpy()}
+        for col in price_cols:
+            arrays[ticker][col.lower()] = np.ascontiguousarray(df[col].to_numpy(dtype=np.float32))
+        arrays[ticker]["volume"] = np.ascontiguousarray(df["Volume"].to_numpy())
+    return arrays
+
+
+if __name__ == "__main__":
+    equities_data = download_equities()
 
-# Save to CSV
-equities_data.to_csv('equities_intraday_1h_1year.csv')
+    # Save to CSV and refresh the per-ticker Parquet cache
+    equities_data.to_csv(CSV_PATH)
+    write_cache(equities_data)
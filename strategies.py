@@ -1,6 +1,21 @@
 import pandas as pd
 import numpy as np
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+from bt_kernels import (
+    as_f32,
+    blsh_signals,
+    breakout_signals,
+    channel_signals,
+    deviation_signals,
+    ensure_sorted,
+    meanrev_signals,
+    rolling_max,
+    rolling_mean_std,
+    rolling_min,
+    zscore_signals,
+)
 
 
 # ================================================================
@@ -13,6 +28,10 @@ class BaseStrategy(ABC):
     Defines a standard interface for generating signals and positions.
     """
 
+    # Rolling-window results shared by all strategy instances while a
+    # rolling_cache() block is active; None (no caching) otherwise.
+    _rolling_cache = None
+
     @abstractmethod
     def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -27,20 +46,91 @@ class BaseStrategy(ABC):
     def finalize_positions(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Standardizes signals, fills missing values, and ensures no lookahead bias.
+        Both 'signal' and 'position' are stored as int8.
         """
 
         # Ensure a signal column exists
         if "signal" not in df.columns:
             raise ValueError("Strategy did not produce a 'signal' column.")
 
-        # Ensure each row has a trade signal (default = 0)
-        df["signal"] = df["signal"].fillna(0).astype(float).clip(-1, 1)
+        # Ensure each row has a trade signal in {-1, 0, +1} (default = 0).
+        # int8 signals cannot be NaN but may still be out of range (e.g. ±2
+        # from a custom rule), so they are clipped in a copy of the column.
+        signal = df["signal"]
+        if signal.dtype == np.int8:
+            signal = signal.to_numpy().copy()
+            np.clip(signal, -1, 1, out=signal)
+        else:
+            signal = np.clip(signal.to_numpy(dtype=float, na_value=np.nan), -1, 1)
+            signal = np.nan_to_num(signal).astype(np.int8)
 
         # Executed position = previous bar's signal
-        df["position"] = df["signal"].shift(1).fillna(0)
+        position = np.empty_like(signal)
+        position[:1] = 0
+        position[1:] = signal[:-1]
+
+        df["signal"] = signal
+        df["position"] = position
 
         return df
 
+    def _rolling(self, stat, col, w):
+        """
+        Rolling statistic of the price column col over w bars, shared
+        through the cache when called inside a rolling_cache() block.
+        Outside a block the strategies use their fused one-pass kernels instead.
+        stat: "mean_std" → (mean, std), "max" or "min" → ndarray
+
+        Entries are keyed on the column's own buffer (not the float32 copy
+        handed to the kernel, which may be new on every call) and keep a
+        reference to it, so the key stays unique while cached.
+        """
+        cache = BaseStrategy._rolling_cache
+        if cache is not None:
+            src = col.to_numpy()
+            key = (stat, src.ctypes.data, src.size, src.strides, src.dtype.str, w)
+            if key in cache:
+                return cache[key][1]
+
+        x = as_f32(col)
+        if stat == "mean_std":
+            out = rolling_mean_std(x, w)
+        elif stat == "max":
+            out = rolling_max(x, w)
+        elif stat == "min":
+            out = rolling_min(x, w)
+        else:
+            raise ValueError(f"Unknown rolling statistic: {stat}")
+
+        if cache is not None:
+            cache[key] = (src, out)
+
+        return out
+
+
+@contextmanager
+def rolling_cache():
+    """
+    Shares rolling statistics across every strategy run inside the block,
+    e.g. a lookback × threshold sweep over the same price series, so each
+    window is computed once. The cache is dropped when the block exits.
+
+    Entries are keyed on the price buffer, not its contents: do not modify
+    price columns in place inside the block.
+
+    The cache has no entry cap (the earlier 64-entry LRU was dropped): it
+    holds one entry per distinct (column, statistic, window) seen in the
+    block, all freed on exit. Nested blocks share the outermost cache.
+    """
+    outermost = BaseStrategy._rolling_cache is None
+    if outermost:
+        BaseStrategy._rolling_cache = {}
+    try:
+        yield
+    finally:
+        if outermost:
+            BaseStrategy._rolling_cache = None
+
 
 # ================================================================
 # Strategy 1: Buy Low, Sell High (Your Intended Strategy)
@@ -63,23 +153,20 @@ class BuyLowSellHighStrategy(BaseStrategy):
         self.pct_threshold = pct_threshold
 
     def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy().sort_values("Datetime")
+        df = ensure_sorted(df)
+        close = as_f32(df["Close"])
 
-        # Moving average
-        df["ma"] = df["Close"].rolling(self.lookback).mean()
+        # Percent deviation from moving average:
+        #   +1 when price is sufficiently below the average
+        #   -1 when price is sufficiently above the average
+        if self._rolling_cache is None:
+            signal = blsh_signals(close, self.lookback, self.pct_threshold)
+        else:
+            # Moving average shared across thresholds
+            ma, _ = self._rolling("mean_std", df["Close"], self.lookback)
+            signal = deviation_signals(close, ma, self.pct_threshold)
 
-        # Percent deviation from moving average
-        df["dev"] = (df["Close"] - df["ma"]) / df["ma"]
-
-        df["signal"] = 0
-
-        # Buy when price is sufficiently low
-        df.loc[df["dev"] < -self.pct_threshold, "signal"] = 1
-
-        # Short when price is sufficiently high
-        df.loc[df["dev"] > self.pct_threshold, "signal"] = -1
-
-        return self.finalize_positions(df)
+        return self.finalize_positions(df.assign(signal=signal))
 
 
 # ================================================================
@@ -98,18 +185,18 @@ class MeanReversionStrategy(BaseStrategy):
         self.threshold = threshold
 
     def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy().sort_values("Datetime")
-
-        df["ma"] = df["Close"].rolling(self.lookback).mean()
-        df["std"] = df["Close"].rolling(self.lookback).std()
+        df = ensure_sorted(df)
 
-        df["z"] = (df["Close"] - df["ma"]) / df["std"]
+        close = as_f32(df["Close"])
 
-        df["signal"] = 0
-        df.loc[df["z"] > self.threshold, "signal"] = -1   # overbought → short
-        df.loc[df["z"] < -self.threshold, "signal"] = 1   # oversold → long
+        # Rolling z-score: > threshold → short, < -threshold → long
+        if self._rolling_cache is None:
+            signal = meanrev_signals(close, self.lookback, self.threshold)
+        else:
+            ma, std = self._rolling("mean_std", df["Close"], self.lookback)
+            signal = zscore_signals(close, ma, std, self.threshold)
 
-        return self.finalize_positions(df)
+        return self.finalize_positions(df.assign(signal=signal))
 
 
 # ================================================================
@@ -128,16 +215,21 @@ class BreakoutStrategy(BaseStrategy):
         self.lookback = lookback
 
     def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy().sort_values("Datetime")
+        df = ensure_sorted(df)
 
-        df["high_roll"] = df["High"].rolling(self.lookback).max()
-        df["low_roll"]  = df["Low"].rolling(self.lookback).min()
+        close = as_f32(df["Close"])
 
-        df["signal"] = 0
-        df.loc[df["Close"] > df["high_roll"].shift(1), "signal"] = 1
-        df.loc[df["Close"] < df["low_roll"].shift(1), "signal"] = -1
+        # Close vs. the high/low channel of the previous `lookback` bars
+        if self._rolling_cache is None:
+            signal = breakout_signals(
+                close, as_f32(df["High"]), as_f32(df["Low"]), self.lookback
+            )
+        else:
+            high_roll = self._rolling("max", df["High"], self.lookback)
+            low_roll = self._rolling("min", df["Low"], self.lookback)
+            signal = channel_signals(close, high_roll, low_roll)
 
-        return self.finalize_positions(df)
+        return self.finalize_positions(df.assign(signal=signal))
 
 
 # ================================================================
@@ -157,7 +249,10 @@ class CustomStrategy(BaseStrategy):
         self.rule_fn = rule_fn
 
     def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy().sort_values("Datetime")
+        # rule_fn may modify its input in place, so always hand it a copy
+        # (sorting already returns one)
+        sorted_df = ensure_sorted(df)
+        df = sorted_df.copy() if sorted_df is df else sorted_df
         df = self.rule_fn(df)
         return self.finalize_positions(df)
 
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtester
+import bt_kernels as k
+from backtester import Backtester, backtest_batch
+from strategies import BreakoutStrategy, BuyLowSellHighStrategy
+
+
+PIPELINES = [
+    pytest.param(k._pipeline_loop, id="loop"),
+    pytest.param(k._pipeline_numpy, id="fallback"),
+]
+if k.HAVE_NUMBA:
+    PIPELINES.insert(0, pytest.param(k.pipeline, id="numba"))
+
+
+@pytest.mark.parametrize("fn", PIPELINES)
+def test_trade_stats_count_entry_bar(fn, monkeypatch):
+    # A long held over bars 1-2 whose only gain is on its entry bar.
+    # The entry bar's return belongs to the new trade, so it is a win;
+    # before the fused pipeline that bar was dropped and it counted as flat
+    # (the reason AAPL wins went from 162 to 266).
+    monkeypatch.setattr(backtester, "pipeline", fn)
+    df = pd.DataFrame({
+        "Datetime": pd.date_range("2024-01-02", periods=4, freq="h"),
+        "Close": np.array([100, 110, 110, 110], dtype=np.float32),
+        "position": np.array([0, 1, 1, 0], dtype=np.int8),
+    })
+
+    stats = Backtester(df, initial_capital=1_000).run()["trade_stats"]
+
+    assert stats["num_trades"] == 2
+    assert (stats["wins"], stats["losses"]) == (1, 0)
+    assert stats["win_rate"] == 1.0
+    assert stats["avg_pnl"] == pytest.approx(100 / 3, rel=1e-5)
+
+
+def _bars(position):
+    n = len(position)
+    return pd.DataFrame({
+        "Datetime": pd.date_range("2024-01-02", periods=n, freq="h"),
+        "Close": np.linspace(100, 110, n, dtype=np.float32),
+        "position": position,
+    })
+
+
+def test_nan_position_is_flat():
+    # A hand-built signal.shift(1) leaves NaN on the first bar
+    signal = pd.Series([1.0, -1.0, 1.0, 0.0, 1.0])
+    a = Backtester(_bars(signal.shift(1))).run()
+    b = Backtester(_bars(signal.shift(1).fillna(0).astype(np.int8))).run()
+
+    assert a["final_equity"] == b["final_equity"]
+    assert a["trade_stats"] == b["trade_stats"]
+
+
+@pytest.mark.parametrize("bad", [0.5, 300.0, np.inf])
+def test_out_of_range_position_raises(bad):
+    with pytest.raises(ValueError, match="position"):
+        Backtester(_bars([0.0, bad, -1.0, 0.0])).run()
+
+
+def _ticker(seed, n=300):
+    rng = np.random.default_rng(seed)
+    close = (100 + rng.standard_normal(n).cumsum()).astype(np.float32)
+    return pd.DataFrame({
+        "Datetime": pd.date_range("2024-01-02", periods=n, freq="h"),
+        "High": close + np.float32(0.5),
+        "Low": close - np.float32(0.5),
+        "Close": close,
+    })
+
+
+@pytest.mark.parametrize("have_joblib", [True, False], ids=["joblib", "serial"])
+def test_backtest_batch_matches_serial_runs(have_joblib, monkeypatch):
+    if have_joblib and not backtester.HAVE_JOBLIB:
+        pytest.skip("joblib is not installed")
+    monkeypatch.setattr(backtester, "HAVE_JOBLIB", have_joblib)
+
+    dfs = {"AAA": _ticker(0), "BBB": _ticker(1)}
+    strategies = [BuyLowSellHighStrategy(20, 0.003), BreakoutStrategy(24)]
+
+    results = backtest_batch(dfs, strategies, n_jobs=1)
+
+    assert list(results) == [(t, s) for t in dfs for s in strategies]
+    for (ticker, strategy), got in results.items():
+        want = Backtester(strategy.generate_signals(dfs[ticker])).run()
+        pd.testing.assert_frame_equal(got.pop("df"), want.pop("df"))
+        assert got == want
@@ -0,0 +1,301 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import bt_kernels as k
+
+
+def _impls(bound, loop, fallback):
+    """
+    Each kernel as numba compiles it (when installed), the same loop run as
+    plain Python, and the NumPy/pandas fallback used without numba.
+    """
+    impls = [pytest.param(loop, id="loop"), pytest.param(fallback, id="fallback")]
+    if k.HAVE_NUMBA:
+        impls.insert(0, pytest.param(bound, id="numba"))
+    return impls
+
+
+def _prices(n=300, seed=0):
+    """
+    float32 random-walk prices with a few NaN gaps.
+    """
+    rng = np.random.default_rng(seed)
+    x = (100 + rng.standard_normal(n).cumsum()).astype(np.float32)
+    x[[0, 40, 41, 200]] = np.nan
+    return x
+
+
+WINDOWS = [1, 2, 5, 20, 400]
+
+
+# ================================================================
+# Rolling Window Statistics
+# ================================================================
+
+@pytest.mark.parametrize("w", WINDOWS)
+@pytest.mark.parametrize(
+    "fn", _impls(k.rolling_mean_std, k._rolling_mean_std_loop, k._rolling_mean_std_pandas)
+)
+def test_rolling_mean_std_matches_pandas(fn, w):
+    x = _prices()
+    roll = pd.Series(x, dtype=np.float64).rolling(w)
+
+    mean, std = fn(x, w)
+
+    assert mean.dtype == std.dtype == np.float32
+    np.testing.assert_allclose(mean, roll.mean(), rtol=1e-6)
+    np.testing.assert_allclose(std, roll.std(), rtol=1e-5, atol=1e-5)
+
+
+@pytest.mark.parametrize("w", WINDOWS)
+@pytest.mark.parametrize("fn", _impls(k.rolling_max, k._rolling_max_loop, k._rolling_max_pandas))
+def test_rolling_max_matches_pandas(fn, w):
+    x = _prices()
+    np.testing.assert_array_equal(fn(x, w), pd.Series(x).rolling(w).max())
+
+
+@pytest.mark.parametrize("w", WINDOWS)
+@pytest.mark.parametrize("fn", _impls(k.rolling_min, k._rolling_min_loop, k._rolling_min_pandas))
+def test_rolling_min_matches_pandas(fn, w):
+    x = _prices()
+    np.testing.assert_array_equal(fn(x, w), pd.Series(x).rolling(w).min())
+
+
+# ================================================================
+# Signal Kernels
+# ================================================================
+# Reference signals use the original strategies' formulation: pandas
+# rolling statistics, then df.loc[mask, "signal"] assignments in order,
+# so the later assignment wins where the thresholds overlap. Statistics
+# are rounded to float32, as the kernels store them.
+
+def _bars(n=300, seed=0):
+    """
+    float32 close/high/low with NaN gaps. High and Low are drawn
+    independently of each other, so channels can cross.
+    """
+    rng = np.random.default_rng(seed)
+    close = _prices(n, seed)
+    high = (close + rng.standard_normal(n)).astype(np.float32)
+    low = (close + rng.standard_normal(n)).astype(np.float32)
+    high[100] = np.nan
+    low[250] = np.nan
+    return close, high, low
+
+
+def _rolling_f32(x, w, stat):
+    return getattr(pd.Series(x).rolling(w), stat)().to_numpy(dtype=np.float32)
+
+
+def _ref_deviation(close, ma, thr):
+    df = pd.DataFrame({"Close": close, "ma": ma})
+    df["dev"] = (df["Close"] - df["ma"]) / df["ma"]
+    df["signal"] = 0
+    df.loc[df["dev"] < -thr, "signal"] = 1
+    df.loc[df["dev"] > thr, "signal"] = -1
+    return df["signal"].to_numpy()
+
+
+def _ref_zscore(close, ma, std, thr):
+    df = pd.DataFrame({"Close": close, "ma": ma, "std": std})
+    df["z"] = (df["Close"] - df["ma"]) / df["std"]
+    df["signal"] = 0
+    df.loc[df["z"] > thr, "signal"] = -1
+    df.loc[df["z"] < -thr, "signal"] = 1
+    return df["signal"].to_numpy()
+
+
+def _ref_channel(close, high_roll, low_roll):
+    df = pd.DataFrame({"Close": close, "high_roll": high_roll, "low_roll": low_roll})
+    df["signal"] = 0
+    df.loc[df["Close"] > df["high_roll"].shift(1), "signal"] = 1
+    df.loc[df["Close"] < df["low_roll"].shift(1), "signal"] = -1
+    return df["signal"].to_numpy()
+
+
+# Negative thresholds make the long and short conditions overlap
+DEV_THRESHOLDS = [0.002, -0.002]
+Z_THRESHOLDS = [1.0, -0.5]
+
+
+@pytest.mark.parametrize("thr", DEV_THRESHOLDS)
+@pytest.mark.parametrize("w", WINDOWS)
+@pytest.mark.parametrize(
+    "fn", _impls(k.deviation_signals, k._deviation_signals_loop, k._deviation_signals_numpy)
+)
+def test_deviation_signals_match_pandas(fn, w, thr):
+    close, _, _ = _bars()
+    ma = _rolling_f32(close, w, "mean")
+
+    sig = fn(close, ma, thr)
+
+    assert sig.dtype == np.int8
+    np.testing.assert_array_equal(sig, _ref_deviation(close, ma, thr))
+
+
+@pytest.mark.parametrize("thr", Z_THRESHOLDS)
+@pytest.mark.parametrize("w", WINDOWS)
+@pytest.mark.parametrize(
+    "fn", _impls(k.zscore_signals, k._zscore_signals_loop, k._zscore_signals_numpy)
+)
+def test_zscore_signals_match_pandas(fn, w, thr):
+    close, _, _ = _bars()
+    ma = _rolling_f32(close, w, "mean")
+    std = _rolling_f32(close, w, "std")
+
+    sig = fn(close, ma, std, thr)
+
+    assert sig.dtype == np.int8
+    np.testing.assert_array_equal(sig, _ref_zscore(close, ma, std, thr))
+
+
+@pytest.mark.parametrize("w", WINDOWS)
+@pytest.mark.parametrize(
+    "fn", _impls(k.channel_signals, k._channel_signals_loop, k._channel_signals_numpy)
+)
+def test_channel_signals_match_pandas(fn, w):
+    close, high, low = _bars()
+    high_roll = _rolling_f32(high, w, "max")
+    low_roll = _rolling_f32(low, w, "min")
+
+    sig = fn(close, high_roll, low_roll)
+
+    assert sig.dtype == np.int8
+    np.testing.assert_array_equal(sig, _ref_channel(close, high_roll, low_roll))
+
+
+def test_signal_references_cover_overlaps():
+    # The data above must actually exercise the precedence rules
+    close, high, low = _bars()
+    ma = _rolling_f32(close, 5, "mean")
+    dev = (close - ma) / ma
+    assert ((dev < 0.002) & (dev > -0.002)).any()
+
+    prev_high = np.roll(_rolling_f32(high, 1, "max"), 1)
+    prev_low = np.roll(_rolling_f32(low, 1, "min"), 1)
+    assert ((close[1:] > prev_high[1:]) & (close[1:] < prev_low[1:])).any()
+
+
+@pytest.mark.parametrize("thr", DEV_THRESHOLDS)
+@pytest.mark.parametrize("w", WINDOWS)
+@pytest.mark.parametrize(
+    "fn", _impls(k.blsh_signals, k._blsh_signals_loop, k._blsh_signals_numpy)
+)
+def test_blsh_signals_match_pandas(fn, w, thr):
+    close, _, _ = _bars()
+    expected = _ref_deviation(close, _rolling_f32(close, w, "mean"), thr)
+    np.testing.assert_array_equal(fn(close, w, thr), expected)
+
+
+@pytest.mark.parametrize("thr", Z_THRESHOLDS)
+@pytest.mark.parametrize("w", WINDOWS)
+@pytest.mark.parametrize(
+    "fn", _impls(k.meanrev_signals, k._meanrev_signals_loop, k._meanrev_signals_numpy)
+)
+def test_meanrev_signals_match_pandas(fn, w, thr):
+    close, _, _ = _bars()
+    ma = _rolling_f32(close, w, "mean")
+    std = _rolling_f32(close, w, "std")
+    np.testing.assert_array_equal(fn(close, w, thr), _ref_zscore(close, ma, std, thr))
+
+
+@pytest.mark.parametrize("w", WINDOWS)
+@pytest.mark.parametrize(
+    "fn", _impls(k.breakout_signals, k._breakout_signals_loop, k._breakout_signals_numpy)
+)
+def test_breakout_signals_match_pandas(fn, w):
+    close, high, low = _bars()
+    expected = _ref_channel(close, _rolling_f32(high, w, "max"), _rolling_f32(low, w, "min"))
+    np.testing.assert_array_equal(fn(close, high, low, w), expected)
+
+
+@pytest.mark.parametrize(
+    "fn",
+    [pytest.param(k.blsh_signals_batch, id="bound"), pytest.param(k._blsh_signals_batch_loop, id="loop")],
+)
+def test_blsh_signals_batch_matches_rows(fn):
+    close = np.stack([_prices(seed=seed) for seed in range(4)])
+
+    sig = fn(close, 20, 0.002)
+
+    assert sig.dtype == np.int8
+    for row, c in zip(sig, close):
+        np.testing.assert_array_equal(row, k.blsh_signals(c, 20, 0.002))
+
+# ================================================================
+# Backtest Pipeline
+# ================================================================
+
+@pytest.mark.parametrize("fn", _impls(k.pipeline, k._pipeline_loop, k._pipeline_numpy))
+def test_pipeline_matches_pandas(fn):
+    close = _prices()
+    rng = np.random.default_rng(1)
+    pos = np.repeat(rng.integers(-1, 2, 30), 10).astype(np.int8)
+    cap = 100_000.0
+
+    returns, strat, equity, buy_hold, _ = fn(close, pos, cap)
+
+    # Reference: the original pandas formulation
+    exp_returns = pd.Series(close, dtype=np.float64).pct_change(fill_method=None)
+    exp_strat = exp_returns * pos
+    exp_equity = cap * (1 + exp_strat.fillna(0)).cumprod()
+    exp_buy_hold = cap * (1 + exp_returns.fillna(0)).cumprod()
+
+    np.testing.assert_allclose(returns, exp_returns, rtol=1e-5, atol=1e-7)
+    np.testing.assert_allclose(strat, exp_strat, rtol=1e-5, atol=1e-7)
+    np.testing.assert_allclose(equity, exp_equity, rtol=1e-4)
+    np.testing.assert_allclose(buy_hold, exp_buy_hold, rtol=1e-4)
+
+
+@pytest.mark.parametrize("fn", _impls(k.pipeline, k._pipeline_loop, k._pipeline_numpy))
+def test_pipeline_trade_segments_match_pandas(fn):
+    close = _prices()
+    rng = np.random.default_rng(1)
+    pos = np.repeat(rng.integers(-1, 2, 30), 10).astype(np.int8)
+
+    num_trades, wins, losses, sum_pnl, n_pnl = fn(close, pos, 100_000.0)[4]
+
+    # One segment per run of constant position, PnL summed over its bars
+    strat = pd.Series(close, dtype=np.float64).pct_change(fill_method=None) * pos
+    segment = (pd.Series(pos) != pd.Series(pos).shift()).cumsum()
+    seg_pnl = strat.groupby(segment).sum()
+
+    assert num_trades == seg_pnl.size - 1
+    assert n_pnl == seg_pnl.size
+    assert wins == (seg_pnl > 0).sum()
+    assert losses == (seg_pnl < 0).sum()
+    assert sum_pnl == pytest.approx(seg_pnl.sum(), rel=1e-4)
+
+# ================================================================
+# Performance Metrics
+# ================================================================
+
+@pytest.mark.parametrize("fn", _impls(k.max_drawdown, k._max_drawdown_loop, k._max_drawdown_numpy))
+def test_max_drawdown_matches_pandas(fn):
+    eq = np.abs(_prices(seed=2)[1:]) * 1_000
+    eq = np.nan_to_num(eq, nan=100_000).astype(np.float32)
+    s = pd.Series(eq, dtype=np.float64)
+
+    assert fn(eq) == pytest.approx((s / s.cummax() - 1).min(), rel=1e-5)
+
+
+@pytest.mark.parametrize("fn", _impls(k.max_drawdown, k._max_drawdown_loop, k._max_drawdown_numpy))
+def test_max_drawdown_rising_curve_is_zero(fn):
+    assert fn(np.arange(1, 10, dtype=np.float32)) == 0.0
+    assert fn(np.empty(0, dtype=np.float32)) == 0.0
+
+
+@pytest.mark.parametrize("n", [0, 1, 2, 300])
+@pytest.mark.parametrize("fn", _impls(k.mean_std, k._mean_std_loop, k._mean_std_numpy))
+def test_mean_std_matches_pandas(fn, n):
+    # n float32 returns between NaNs, which are skipped; the std needs
+    # at least two values
+    rng = np.random.default_rng(0)
+    x = np.full(n + 2, np.nan, dtype=np.float32)
+    x[1:-1] = rng.standard_normal(n) * 0.01
+    s = pd.Series(x, dtype=np.float64)
+
+    mean, std = fn(x)
+
+    np.testing.assert_allclose([mean, std], [s.mean(), s.std()], rtol=1e-9, atol=0)
@@ -0,0 +1,20 @@
+import numpy as np
+
+import data_loader
+
+
+def test_load_ticker_builds_cache_from_csv(tmp_path, monkeypatch):
+    # The bundled CSV must be enough; never touch the network
+    def no_download(*args, **kwargs):
+        raise AssertionError("download_equities called")
+
+    monkeypatch.setattr(data_loader, "download_equities", no_download)
+    cache_dir = tmp_path / "cache"
+
+    df = data_loader.load_ticker("AAPL", cache_dir, data_loader.CSV_PATH)
+
+    assert (cache_dir / "AAPL_1h.parquet").exists()
+    assert list(df.columns) == ["Datetime", "Open", "High", "Low", "Close", "Volume"]
+    assert (df[data_loader.price_cols].dtypes == np.float32).all()
+    assert df["Datetime"].is_monotonic_increasing
+    assert len(df) > 0
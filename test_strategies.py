@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import strategies
+from bt_kernels import rolling_mean_std
+from strategies import (
+    BaseStrategy,
+    BreakoutStrategy,
+    BuyLowSellHighStrategy,
+    CustomStrategy,
+    MeanReversionStrategy,
+    rolling_cache,
+)
+
+
+def _bars(n=300, seed=0):
+    """
+    Hourly float32 bars with a few NaN gaps.
+    """
+    rng = np.random.default_rng(seed)
+    close = (100 + rng.standard_normal(n).cumsum()).astype(np.float32)
+    close[[0, 40, 41, 200]] = np.nan
+    return pd.DataFrame({
+        "Datetime": pd.date_range("2024-01-02", periods=n, freq="h"),
+        "High": close + np.float32(0.5),
+        "Low": close - np.float32(0.5),
+        "Close": close,
+    })
+
+
+STRATEGIES = [
+    pytest.param(lambda w: BuyLowSellHighStrategy(w, 0.002), id="blsh"),
+    pytest.param(lambda w: MeanReversionStrategy(w, 1.0), id="meanrev"),
+    pytest.param(BreakoutStrategy, id="breakout"),
+]
+
+
+@pytest.mark.parametrize("w", [1, 2, 5, 20, 400])
+@pytest.mark.parametrize("make", STRATEGIES)
+def test_fused_and_cached_signals_match(make, w):
+    # Outside a rolling_cache() block the fused kernels run; inside it the
+    # cached rolling statistics feed the threshold kernels
+    df = _bars()
+    fused = make(w).generate_signals(df)
+    with rolling_cache():
+        cached = make(w).generate_signals(df)
+
+    pd.testing.assert_frame_equal(fused, cached)
+
+
+# ================================================================
+# Rolling Cache
+# ================================================================
+
+@pytest.fixture
+def count_rolling(monkeypatch):
+    """
+    Counts rolling_mean_std calls made by the strategies.
+    """
+    calls = []
+
+    def counted(x, w):
+        calls.append(w)
+        return rolling_mean_std(x, w)
+
+    monkeypatch.setattr(strategies, "rolling_mean_std", counted)
+    return calls
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_cache_reuses_entry_within_block(count_rolling, dtype):
+    # float64 prices are converted to a new float32 array on every call,
+    # so entries must be keyed on the source column
+    df = _bars().astype({"Close": dtype})
+
+    with rolling_cache():
+        first = BuyLowSellHighStrategy(20, 0.002).generate_signals(df)
+        BuyLowSellHighStrategy(20, 0.004).generate_signals(df)
+        MeanReversionStrategy(20, 1.0).generate_signals(df)
+        again = BuyLowSellHighStrategy(20, 0.002).generate_signals(df)
+        assert len(BaseStrategy._rolling_cache) == 1
+
+    assert count_rolling == [20]
+    pd.testing.assert_frame_equal(first, again)
+
+
+def test_cache_is_dropped_on_exit():
+    with rolling_cache():
+        assert BaseStrategy._rolling_cache == {}
+    assert BaseStrategy._rolling_cache is None
+
+    with pytest.raises(RuntimeError):
+        with rolling_cache():
+            raise RuntimeError
+    assert BaseStrategy._rolling_cache is None
+
+
+def test_nested_blocks_keep_outer_cache():
+    df = _bars()
+    with rolling_cache():
+        outer = BaseStrategy._rolling_cache
+        with rolling_cache():
+            assert BaseStrategy._rolling_cache is outer
+            BuyLowSellHighStrategy(20, 0.002).generate_signals(df)
+        assert BaseStrategy._rolling_cache is outer
+        assert len(outer) == 1
+    assert BaseStrategy._rolling_cache is None
+
+
+def test_in_place_edit_between_blocks(count_rolling):
+    df = _bars()
+    strategy = BuyLowSellHighStrategy(5, 0.002)
+    with rolling_cache():
+        strategy.generate_signals(df)
+
+    # Same buffer, new contents: a new block must not see the old entry
+    df["Close"] *= np.float32(1.5)
+    df.loc[100:110, "Close"] = np.float32(300)
+    with rolling_cache():
+        cached = strategy.generate_signals(df)
+
+    assert count_rolling == [5, 5]
+    pd.testing.assert_frame_equal(cached, strategy.generate_signals(df.copy()))
+
+
+# ================================================================
+# finalize_positions
+# ================================================================
+
+@pytest.mark.parametrize(
+    "signal, expected",
+    [
+        pytest.param(np.array([2, -2, 1, 0, -1], dtype=np.int8), [1, -1, 1, 0, -1], id="int8"),
+        pytest.param(np.array([np.nan, 0.7, -3.0, 1.0, np.nan]), [0, 0, -1, 1, 0], id="float"),
+        pytest.param(np.array([True, False, True, True, False]), [1, 0, 1, 1, 0], id="bool"),
+        pytest.param(pd.array([1, None, -1, 2, 0], dtype="Int64"), [1, 0, -1, 1, 0], id="Int64"),
+    ],
+)
+def test_finalize_positions(signal, expected):
+    original = signal.copy()
+    df = pd.DataFrame({
+        "Datetime": pd.date_range("2024-01-02", periods=5, freq="h"),
+        "signal": signal,
+    })
+
+    out = CustomStrategy(lambda d: d).finalize_positions(df)
+
+    assert out["signal"].dtype == out["position"].dtype == np.int8
+    assert out["signal"].tolist() == expected
+    assert out["position"].tolist() == [0] + expected[:-1]
+    # The caller's array is left untouched
+    np.testing.assert_array_equal(np.asarray(signal), np.asarray(original))